@@ -3,38 +3,214 @@ Email Sender Module
 Sends generated fulfillment sticker PDFs via email using SMTP
 """
 
+import mmap
 import os
 import smtplib
+from collections import namedtuple
+from functools import lru_cache
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 from datetime import datetime
-from dotenv import load_dotenv
+from pathlib import Path
+from string import Template
+from dotenv import dotenv_values
+
+
+# env.env lives in the project root (parent of src/)
+ENV_PATH = Path(__file__).resolve().parent.parent / 'env.env'
+
+EmailConfig = namedtuple(
+    "EmailConfig",
+    ["smtp_server", "smtp_port", "email_from", "email_password", "email_to", "email_subject_template"],
+)
+
+
+# HTML email body, parsed once at import ($extra_block is '' when there is no additional info)
+_BODY_TEMPLATE = Template("""
+        <html>
+            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+                <h2 style="color: #2c3e50;">Daily Fulfillment Stickers - $date</h2>
+                <p>Hello,</p>
+                <p>Attached are today's fulfillment stickers for Spiritus Coffee Co.</p>
+
+                <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #007bff; margin: 20px 0;">
+                    <strong>Summary:</strong><br>
+                    • Orders processed: <strong>$order_count</strong><br>
+                    • Stickers generated: <strong>$order_count $sticker_text</strong><br>
+                    • File: <strong>$filename</strong>
+                </div>
+        $extra_block
+                <p><strong>Instructions:</strong></p>
+                <ul>
+                    <li>Print the attached PDF on Avery 5160 label sheets</li>
+                    <li>Each line item gets its own sticker</li>
+                    <li>Orders marked <strong style="color: red;">SHIP</strong> require shipping labels</li>
+                    <li>Other orders are for local delivery</li>
+                </ul>
+
+                <p style="color: #6c757d; font-size: 0.9em; margin-top: 30px;">
+                    This is an automated message from the Spiritus Coffee Fulfillment System.<br>
+                    Generated on $footer_ts
+                </p>
+            </body>
+        </html>
+        """)
+
+# Optional "Additional Information" block spliced into $extra_block
+_EXTRA_TEMPLATE = Template("""
+                <div style="background-color: #fff3cd; padding: 15px; border-left: 4px solid #ffc107; margin: 20px 0;">
+                    <strong>Additional Information:</strong><br>
+                    $info
+                </div>
+            """)
+
+_FOOTER_TIMESTAMP_FORMAT = "%Y-%m-%d at %I:%M %p"
+
+
+@lru_cache(maxsize=1)
+def _load_env(path, mtime):
+    """
+    Parse an env file once per modification time.
+
+    Args:
+        path: Path to the env file
+        mtime: Modification time of the file (cache key), None if missing
+
+    Returns:
+        dict of variables defined in the file
+    """
+    return dotenv_values(path) if mtime is not None else {}
+
+
+def _getenv(env, key, default=None):
+    """Look up a variable, letting the process environment override env.env."""
+    value = os.environ.get(key)
+    if value is None:
+        value = env.get(key)
+    return default if value is None else value
 
 
 class EmailSender:
     """Handles sending emails with PDF attachments via SMTP"""
 
+    # Seconds to wait on SMTP socket operations
+    SMTP_TIMEOUT = 30
+
+    # Reconnect attempts when the server drops the connection mid-send
+    SMTP_SEND_RETRIES = 2
+
     def __init__(self):
         """Load email configuration from environment variables"""
-        # Load env.env from parent directory
-        env_path = os.path.join(os.path.dirname(__file__), '..', 'env.env')
-        load_dotenv(env_path)
+        config = self._load_config()
+
+        self.smtp_server = config.smtp_server
+        self.smtp_port = config.smtp_port
+        self.email_from = config.email_from
+        self.email_password = config.email_password
+        self.email_to = list(config.email_to)
+        self.email_subject_template = config.email_subject_template
 
-        self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        self.email_from = os.getenv("EMAIL_FROM")
-        self.email_password = os.getenv("EMAIL_PASSWORD")
-        self.email_to = os.getenv("EMAIL_TO", "").split(",")
-        self.email_subject_template = os.getenv("EMAIL_SUBJECT", "Daily Fulfillment Stickers - {date}")
+        # SMTP connection opened lazily and reused across sends
+        self._smtp = None
 
         # Validate required configuration
         if not self.email_from or not self.email_password:
             raise ValueError("EMAIL_FROM and EMAIL_PASSWORD must be set in env.env")
 
-        if not self.email_to or self.email_to == ['']:
+        if not self.email_to:
             raise ValueError("EMAIL_TO must be set in env.env")
 
+    @staticmethod
+    def _load_config():
+        """
+        Resolve the email configuration, process environment first and then env.env.
+        The env.env parse is cached and only redone when the file changes.
+
+        Returns:
+            EmailConfig namedtuple
+        """
+        try:
+            mtime = os.stat(ENV_PATH).st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        env = _load_env(ENV_PATH, mtime)
+        return EmailConfig(
+            smtp_server=_getenv(env, "SMTP_SERVER", "smtp.gmail.com"),
+            smtp_port=int(_getenv(env, "SMTP_PORT", "587")),
+            email_from=_getenv(env, "EMAIL_FROM"),
+            email_password=_getenv(env, "EMAIL_PASSWORD"),
+            email_to=tuple(addr.strip() for addr in _getenv(env, "EMAIL_TO", "").split(",") if addr.strip()),
+            email_subject_template=_getenv(env, "EMAIL_SUBJECT", "Daily Fulfillment Stickers - {date}"),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_smtp(self):
+        """
+        Return a live, authenticated SMTP connection.
+        Reuses the cached connection if it still answers NOOP, otherwise reconnects.
+
+        Returns:
+            smtplib.SMTP: Connected and logged-in SMTP client
+        """
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPServerDisconnected, OSError):
+                pass
+            self.close()
+
+        print(f"\n[Email] Connecting to {self.smtp_server}:{self.smtp_port}...")
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.SMTP_TIMEOUT)
+        try:
+            server.starttls()
+            server.login(self.email_from, self.email_password)
+        except Exception:
+            server.close()
+            raise
+
+        if not server.has_extn("pipelining"):
+            print("[Email] Note: server does not advertise PIPELINING")
+
+        self._smtp = server
+        return server
+
+    def _send_raw(self, raw_message):
+        """
+        Send a serialized message to all recipients in one transaction,
+        reconnecting if the server drops the connection.
+
+        Args:
+            raw_message: Message bytes from msg.as_bytes()
+        """
+        for attempt in range(self.SMTP_SEND_RETRIES + 1):
+            server = self._get_smtp()
+            try:
+                server.sendmail(self.email_from, self.email_to, raw_message)
+                return
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                if attempt == self.SMTP_SEND_RETRIES:
+                    raise
+                print("[Email] Connection lost, reconnecting...")
+
+    def close(self):
+        """Close the cached SMTP connection, if any."""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
     def send_pdf(self, pdf_path, order_count=0, additional_info=""):
         """
         Send the PDF file via email
@@ -48,37 +224,44 @@ class EmailSender:
             bool: True if email sent successfully, False otherwise
         """
         try:
-            # Verify PDF file exists
-            if not os.path.exists(pdf_path):
+            # Open the PDF up front (no separate exists() check)
+            try:
+                pdf_file = open(pdf_path, 'rb')
+            except FileNotFoundError:
                 print(f"Error: PDF file not found at {pdf_path}")
                 return False
 
-            # Extract date from filename or use current date
-            pdf_filename = os.path.basename(pdf_path)
-            today = datetime.now().strftime("%Y-%m-%d")
-
-            # Create email message
-            msg = MIMEMultipart()
-            msg['From'] = self.email_from
-            msg['To'] = ", ".join(self.email_to)
-            msg['Subject'] = self.email_subject_template.format(date=today)
-
-            # Create email body
-            body = self._create_email_body(today, order_count, pdf_filename, additional_info)
-            msg.attach(MIMEText(body, 'html'))
-
-            # Attach PDF file
-            with open(pdf_path, 'rb') as pdf_file:
-                pdf_attachment = MIMEApplication(pdf_file.read(), _subtype="pdf")
+            with pdf_file:
+                # Extract date from filename or use current date
+                pdf_filename = os.path.basename(pdf_path)
+                today = datetime.now().strftime("%Y-%m-%d")
+
+                # Create email message
+                msg = MIMEMultipart()
+                msg['From'] = self.email_from
+                msg['To'] = ", ".join(self.email_to)
+                msg['Subject'] = self.email_subject_template.format(date=today)
+
+                # Create email body
+                body = self._create_email_body(today, order_count, pdf_filename, additional_info)
+                msg.attach(MIMEText(body, 'html'))
+
+                # Attach PDF file (memory-mapped; the payload is base64-encoded on construction,
+                # so the mapping can be released right away). Empty files cannot be mapped.
+                if os.fstat(pdf_file.fileno()).st_size:
+                    with mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_data:
+                        pdf_attachment = MIMEApplication(pdf_data, _subtype="pdf")
+                else:
+                    pdf_attachment = MIMEApplication(pdf_file.read(), _subtype="pdf")
                 pdf_attachment.add_header('Content-Disposition', 'attachment', filename=pdf_filename)
                 msg.attach(pdf_attachment)
 
+            # Serialize once with CRLF line endings (as send_message would) so
+            # retries reuse the encoded payload instead of re-encoding the PDF
+            raw_message = msg.as_bytes(policy=msg.policy.clone(linesep="\r\n"))
+
             # Send email
-            print(f"\n[Email] Connecting to {self.smtp_server}:{self.smtp_port}...")
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_from, self.email_password)
-                server.send_message(msg)
+            self._send_raw(raw_message)
 
             print(f"[Email] Successfully sent to: {', '.join(self.email_to)}")
             return True
@@ -108,47 +291,16 @@ class EmailSender:
         """
         sticker_text = "sticker" if order_count == 1 else "stickers"
 
-        body = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <h2 style="color: #2c3e50;">Daily Fulfillment Stickers - {date}</h2>
-                <p>Hello,</p>
-                <p>Attached are today's fulfillment stickers for Spiritus Coffee Co.</p>
-
-                <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #007bff; margin: 20px 0;">
-                    <strong>Summary:</strong><br>
-                    • Orders processed: <strong>{order_count}</strong><br>
-                    • Stickers generated: <strong>{order_count} {sticker_text}</strong><br>
-                    • File: <strong>{filename}</strong>
-                </div>
-        """
-
-        if additional_info:
-            body += f"""
-                <div style="background-color: #fff3cd; padding: 15px; border-left: 4px solid #ffc107; margin: 20px 0;">
-                    <strong>Additional Information:</strong><br>
-                    {additional_info}
-                </div>
-            """
-
-        body += """
-                <p><strong>Instructions:</strong></p>
-                <ul>
-                    <li>Print the attached PDF on Avery 5160 label sheets</li>
-                    <li>Each line item gets its own sticker</li>
-                    <li>Orders marked <strong style="color: red;">SHIP</strong> require shipping labels</li>
-                    <li>Other orders are for local delivery</li>
-                </ul>
-
-                <p style="color: #6c757d; font-size: 0.9em; margin-top: 30px;">
-                    This is an automated message from the Spiritus Coffee Fulfillment System.<br>
-                    Generated on """ + datetime.now().strftime("%Y-%m-%d at %I:%M %p") + """
-                </p>
-            </body>
-        </html>
-        """
+        extra_block = _EXTRA_TEMPLATE.substitute(info=additional_info) if additional_info else ""
 
-        return body
+        return _BODY_TEMPLATE.substitute(
+            date=date,
+            order_count=order_count,
+            sticker_text=sticker_text,
+            filename=filename,
+            extra_block=extra_block,
+            footer_ts=datetime.now().strftime(_FOOTER_TIMESTAMP_FORMAT),
+        )
 
 
 def main():
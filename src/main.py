@@ -9,8 +9,10 @@ Coordinates all modules to generate fulfillment stickers:
 5. Generate PDF with Avery 5160 format
 """
 
+import atexit
 import os
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from shopify_connector import ShopifyConnector
 from order_processor import OrderProcessor
@@ -18,6 +20,44 @@ from pdf_generator import PDFGenerator
 from email_sender import EmailSender
 
 
+def send_pdf_email(pdf_path: str, order_count: int, additional_info: str) -> bool:
+    """
+    Email the generated PDF (runs on a background thread).
+
+    Args:
+        pdf_path: Path to the PDF file to send
+        order_count: Number of stickers in the PDF
+        additional_info: Extra summary line for the email body
+
+    Returns:
+        True if the email was sent successfully
+    """
+    with EmailSender() as email_sender:
+        return email_sender.send_pdf(pdf_path, order_count=order_count, additional_info=additional_info)
+
+
+def report_email_result(executor: ThreadPoolExecutor, future: Future):
+    """
+    Report the outcome of the background email send.
+    Registered with atexit; the interpreter joins the executor's worker thread
+    before atexit callbacks run, so the send has always finished by then
+    (each SMTP operation is bounded by EmailSender.SMTP_TIMEOUT).
+
+    Args:
+        executor: Executor running the send
+        future: Future returned by executor.submit()
+    """
+    try:
+        if future.result():
+            print(f"[OK] Email sent successfully!")
+        else:
+            print(f"[WARNING] Email failed to send. Check email configuration in env.env")
+    except Exception as e:
+        print(f"[WARNING] Email error: {e}")
+    finally:
+        executor.shutdown()
+
+
 def run_sticker_generation(days_back: int = 10, output_dir: str = "output", auto_email: bool = True):
     """
     Main workflow to generate fulfillment stickers.
@@ -76,8 +116,8 @@ def run_sticker_generation(days_back: int = 10, output_dir: str = "output", auto
         print(f"[OK] Generated {len(stickers)} stickers from {len(filtered_orders)} orders")
 
         # Display breakdown
-        local_count = sum(1 for s in stickers if not s.requires_shipping)
-        shipping_count = sum(1 for s in stickers if s.requires_shipping)
+        shipping_count = sum(s.requires_shipping for s in stickers)
+        local_count = len(stickers) - shipping_count
         print(f"  - Local delivery: {local_count}")
         print(f"  - Requires shipping: {shipping_count}")
 
@@ -101,17 +141,13 @@ def run_sticker_generation(days_back: int = 10, output_dir: str = "output", auto
         if auto_email:
             print(f"\n{'='*70}")
             print("[EMAIL] Sending PDF via email...")
-            try:
-                email_sender = EmailSender()
-                additional_info = f"Local delivery: {local_count} | Requires shipping: {shipping_count}"
-                email_success = email_sender.send_pdf(pdf_path, order_count=len(stickers), additional_info=additional_info)
-
-                if email_success:
-                    print(f"[OK] Email sent successfully!")
-                else:
-                    print(f"[WARNING] Email failed to send. Check email configuration in env.env")
-            except Exception as e:
-                print(f"[WARNING] Email error: {e}")
+            additional_info = f"Local delivery: {local_count} | Requires shipping: {shipping_count}"
+
+            # Send in the background; the result is reported before the script exits
+            executor = ThreadPoolExecutor(max_workers=1)
+            future = executor.submit(send_pdf_email, pdf_path, len(stickers), additional_info)
+            atexit.register(report_email_result, executor, future)
+            print("[EMAIL] Email queued, sending in background...")
             print(f"{'='*70}")
 
         print(f"\nNext steps:")
@@ -8,8 +8,14 @@ Implements business logic for:
 - Sticker data formatting
 """
 
-from typing import List, Dict, Any
+import io
+import sys
+from typing import List, Dict, Any, Iterable, Iterator, NamedTuple, Optional, Tuple
+from collections import defaultdict
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import repeat
+from operator import attrgetter
 
 
 # Local delivery cities (from PRD)
@@ -21,8 +27,29 @@ LOCAL_DELIVERY_CITIES = [
     "Villa Park"
 ]
 
+# Normalized (lowercase, stripped) lookup set for the default cities
+LOCAL_DELIVERY_CITIES_SET = frozenset(city.lower().strip() for city in LOCAL_DELIVERY_CITIES)
 
-@dataclass
+
+def _intern(value: Any) -> Any:
+    """Intern string values (Shopify may send None for missing fields)."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _full_name(person: Dict[str, Any]) -> str:
+    """Join first and last name from an address or customer dict ('' if neither is set)."""
+    first_name = person.get('first_name') or ''
+    last_name = person.get('last_name') or ''
+    return (first_name + ' ' + last_name).strip()
+
+
+@lru_cache(maxsize=512)
+def _normalize_city(city: str) -> str:
+    """Normalize a city name for comparison (many orders share a city)."""
+    return city.lower().strip()
+
+
+@dataclass(slots=True)
 class StickerData:
     """Data structure for a single sticker."""
     order_name: str
@@ -40,6 +67,23 @@ class StickerData:
     total_for_address: int = 1  # Total stickers for this address
 
 
+class _OrderContext(NamedTuple):
+    """Order-level fields shared by every sticker in an order."""
+    order_name: str
+    customer_name: str
+    address_line1: str
+    address_line2: str
+    city: str
+    state: str
+    zip_code: str
+    requires_shipping: bool
+    line_items: List[Dict[str, Any]]
+
+
+# Grouping key for sticker numbering: (customer_name, address_line1, city), built in C
+_address_key = attrgetter('customer_name', 'address_line1', 'city')
+
+
 class OrderProcessor:
     """Processes orders and generates sticker data."""
 
@@ -50,7 +94,10 @@ class OrderProcessor:
         Args:
             local_cities: List of local delivery city names (optional)
         """
-        self.local_cities = [city.lower() for city in (local_cities or LOCAL_DELIVERY_CITIES)]
+        if local_cities:
+            self.local_cities = frozenset(city.lower().strip() for city in local_cities)
+        else:
+            self.local_cities = LOCAL_DELIVERY_CITIES_SET
 
     def is_local_delivery(self, city: str) -> bool:
         """
@@ -64,143 +111,163 @@ class OrderProcessor:
         """
         if not city:
             return False
-        return city.lower().strip() in self.local_cities
+        return _normalize_city(city) in self.local_cities
 
-    def create_stickers_from_orders(self, orders: List[Dict[str, Any]]) -> List[StickerData]:
+    def iter_stickers_from_orders(self, orders: Iterable[Dict[str, Any]]) -> Iterator[StickerData]:
+        """
+        Lazily convert orders to sticker data structures, one order at a time.
+        Creates ONE sticker per unit (quantity 2 = 2 stickers).
+
+        Stickers are yielded unnumbered (1/1); numbering per address needs the
+        full set, see create_stickers_from_orders().
+
+        Args:
+            orders: Iterable of order dictionaries from Shopify
+
+        Returns:
+            Iterator of StickerData objects (one per unit)
+        """
+        return (
+            StickerData(**fields)
+            for ctx in map(self._build_order_context, orders) if ctx is not None
+            for quantity, fields in self._iter_line_items(ctx)
+            for _ in repeat(None, quantity)
+        )
+
+    def create_stickers_from_orders(self, orders: Iterable[Dict[str, Any]]) -> List[StickerData]:
         """
         Convert orders to sticker data structures.
         Creates ONE sticker per unit (quantity 2 = 2 stickers).
 
         Args:
-            orders: List of order dictionaries from Shopify
+            orders: Iterable of order dictionaries from Shopify
 
         Returns:
             List of StickerData objects (one per unit)
         """
         stickers = []
+        address_groups: Dict[Tuple[str, str, str], List[StickerData]] = defaultdict(list)
 
-        for order in orders:
-            order_stickers = self._process_single_order(order)
-            stickers.extend(order_stickers)
+        # Group by address (customer name + address) while the stickers are created
+        for sticker in self.iter_stickers_from_orders(orders):
+            stickers.append(sticker)
+            address_groups[_address_key(sticker)].append(sticker)
 
         # Calculate sticker numbers per address (e.g., 1/4, 2/4, 3/4, 4/4)
-        self._calculate_sticker_numbers(stickers)
+        self._assign_sticker_numbers(address_groups.values())
 
         return stickers
 
-    def _calculate_sticker_numbers(self, stickers: List[StickerData]):
+    def _assign_sticker_numbers(self, address_groups: Iterable[List[StickerData]]):
         """
-        Calculate sticker numbers for each address.
-        Groups stickers by address and assigns 1/N, 2/N, etc.
+        Assign 1/N, 2/N, etc. within each address group.
 
         Args:
-            stickers: List of StickerData objects to update in place
+            address_groups: Lists of StickerData objects sharing an address, updated in place
         """
-        # Group stickers by address key (name + address)
-        address_groups: Dict[str, List[StickerData]] = {}
-
-        for sticker in stickers:
-            # Create a key based on customer name and address
-            key = f"{sticker.customer_name}|{sticker.address_line1}|{sticker.city}"
-            if key not in address_groups:
-                address_groups[key] = []
-            address_groups[key].append(sticker)
-
-        # Assign sticker numbers within each group
-        for key, group in address_groups.items():
+        for group in address_groups:
             total = len(group)
             for i, sticker in enumerate(group, 1):
                 sticker.sticker_number = i
                 sticker.total_for_address = total
 
-    def _process_single_order(self, order: Dict[str, Any]) -> List[StickerData]:
+    def _build_order_context(self, order: Dict[str, Any]) -> Optional[_OrderContext]:
         """
-        Process a single order and create stickers for each line item.
+        Extract the order-level fields shared by every sticker in an order.
 
         Args:
             order: Order dictionary from Shopify
 
         Returns:
-            List of StickerData objects for this order
+            _OrderContext, or None if the order has no shipping address or line items
         """
-        stickers = []
-
         # Extract order-level info
         order_name = order.get('name', 'Unknown')
 
-        # Customer info
-        customer = order.get('customer', {})
-        customer_name = f"{customer.get('first_name', '')} {customer.get('last_name', '')}".strip()
-        if not customer_name:
-            customer_name = "Unknown Customer"
-
         # Shipping address
-        shipping = order.get('shipping_address', {})
+        shipping = order.get('shipping_address') or {}
         if not shipping:
             print(f"  [WARNING] Order {order_name} has no shipping address, skipping")
-            return stickers
-
-        address_line1 = shipping.get('address1', '')
-        address_line2 = shipping.get('address2', '')
-        city = shipping.get('city', '')
-        state = shipping.get('province_code', shipping.get('province', ''))
-        zip_code = shipping.get('zip', '')
+            return None
 
-        # Determine if requires shipping label
-        requires_shipping = not self.is_local_delivery(city)
+        # Customer info: the sticker shows the shipping name, falling back to the customer record
+        customer_name = (_full_name(shipping)
+                         or _full_name(order.get('customer') or {})
+                         or "Unknown Customer")
 
-        # Process each line item
         line_items = order.get('line_items', [])
-
         if not line_items:
             print(f"  [WARNING] Order {order_name} has no line items, skipping")
-            return stickers
-
-        for item in line_items:
-            quantity = item.get('quantity', 1)
-            product_name = item.get('name', 'Unknown Product')
-
-            # Extract variant information from variant_title
-            variant_title = item.get('variant_title', '')
-
-            # Also check properties (subscription orders often have grind info here)
-            properties = item.get('properties', [])
-            property_parts = []
-            for prop in properties:
-                prop_name = prop.get('name', '')
-                prop_value = prop.get('value', '')
-                # Skip internal/hidden properties (often start with _)
-                if prop_value and not prop_name.startswith('_'):
-                    property_parts.append(prop_value)
-
-            # Combine variant_title and properties for complete info
-            variant_parts = []
-            if variant_title and variant_title != 'Default Title':
-                variant_parts.append(variant_title)
-            if property_parts:
-                variant_parts.extend(property_parts)
-
-            variant_info = ' / '.join(variant_parts) if variant_parts else ''
-
-            # Create one sticker per unit (quantity 2 = 2 stickers)
-            for _ in range(quantity):
-                sticker = StickerData(
-                    order_name=order_name,
-                    customer_name=customer_name,
-                    address_line1=address_line1,
-                    address_line2=address_line2,
-                    city=city,
-                    state=state,
-                    zip_code=zip_code,
-                    quantity=1,  # Each sticker represents 1 unit
-                    product_name=product_name,
-                    variant_info=variant_info,
-                    requires_shipping=requires_shipping
-                )
-
-                stickers.append(sticker)
+            return None
+
+        # Intern fields repeated across orders (same customer/address) so they
+        # are stored once and compare by identity when grouping by address
+        city = _intern(shipping.get('city', ''))
+
+        return _OrderContext(
+            order_name=order_name,
+            customer_name=_intern(customer_name),
+            address_line1=_intern(shipping.get('address1', '')),
+            address_line2=shipping.get('address2', ''),
+            city=city,
+            state=_intern(shipping.get('province_code', shipping.get('province', ''))),
+            zip_code=_intern(shipping.get('zip', '')),
+            requires_shipping=not self.is_local_delivery(city),  # requires shipping label
+            line_items=line_items,
+        )
+
+    def _iter_line_items(self, ctx: _OrderContext) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yield the StickerData fields for each line item of an order.
+        The field dict is built once per line item and shared by all of its units.
 
-        return stickers
+        Args:
+            ctx: Order context from _build_order_context()
+
+        Yields:
+            Tuple of (quantity, StickerData keyword arguments for one unit)
+        """
+        for item in ctx.line_items:
+            yield int(item.get('quantity', 1)), dict(
+                order_name=ctx.order_name,
+                customer_name=ctx.customer_name,
+                address_line1=ctx.address_line1,
+                address_line2=ctx.address_line2,
+                city=ctx.city,
+                state=ctx.state,
+                zip_code=ctx.zip_code,
+                quantity=1,  # Each sticker represents 1 unit
+                product_name=item.get('name', 'Unknown Product'),
+                variant_info=self._format_variant_info(item),
+                requires_shipping=ctx.requires_shipping,
+            )
+
+    def _format_variant_info(self, item: Dict[str, Any]) -> str:
+        """
+        Combine variant title and line item properties into one display string.
+
+        Args:
+            item: Line item dictionary from Shopify
+
+        Returns:
+            Variant info (e.g., "Medium Roast / Ground for Drip"), or '' if none
+        """
+        variant_parts = []
+
+        # Extract variant information from variant_title
+        variant_title = item.get('variant_title', '')
+        if variant_title and variant_title != 'Default Title':
+            variant_parts.append(variant_title)
+
+        # Also check properties (subscription orders often have grind info here)
+        for prop in item.get('properties', []):
+            prop_name = prop.get('name', '')
+            prop_value = prop.get('value', '')
+            # Skip internal/hidden properties (often start with _)
+            if prop_value and not prop_name.startswith('_'):
+                variant_parts.append(prop_value)
+
+        return ' / '.join(variant_parts)
 
     def display_sticker_summary(self, stickers: List[StickerData]):
         """
@@ -209,28 +276,33 @@ class OrderProcessor:
         Args:
             stickers: List of StickerData objects
         """
-        print(f"\n{'='*60}")
-        print(f"STICKER DATA SUMMARY ({len(stickers)} stickers)")
-        print(f"{'='*60}")
+        # Buffer the report and write it once instead of one print per line
+        buf = io.StringIO()
 
-        local_count = sum(1 for s in stickers if not s.requires_shipping)
-        shipping_count = sum(1 for s in stickers if s.requires_shipping)
+        print(f"\n{'='*60}", file=buf)
+        print(f"STICKER DATA SUMMARY ({len(stickers)} stickers)", file=buf)
+        print(f"{'='*60}", file=buf)
 
-        print(f"\nLocal Delivery: {local_count}")
-        print(f"Requires Shipping: {shipping_count}")
+        shipping_count = sum(map(attrgetter('requires_shipping'), stickers))
+        local_count = len(stickers) - shipping_count
+
+        print(f"\nLocal Delivery: {local_count}", file=buf)
+        print(f"Requires Shipping: {shipping_count}", file=buf)
 
         for i, sticker in enumerate(stickers, 1):
             ship_label = "**SHIP**" if sticker.requires_shipping else "LOCAL"
 
-            print(f"\n{i}. [{ship_label}] Order {sticker.order_name}")
-            print(f"   {sticker.customer_name}")
-            print(f"   {sticker.address_line1}")
+            print(f"\n{i}. [{ship_label}] Order {sticker.order_name}", file=buf)
+            print(f"   {sticker.customer_name}", file=buf)
+            print(f"   {sticker.address_line1}", file=buf)
             if sticker.address_line2:
-                print(f"   {sticker.address_line2}")
-            print(f"   {sticker.city}, {sticker.state} {sticker.zip_code}")
-            print(f"   {sticker.quantity}x {sticker.product_name}")
+                print(f"   {sticker.address_line2}", file=buf)
+            print(f"   {sticker.city}, {sticker.state} {sticker.zip_code}", file=buf)
+            print(f"   {sticker.quantity}x {sticker.product_name}", file=buf)
             if sticker.variant_info:
-                print(f"      {sticker.variant_info}")
+                print(f"      {sticker.variant_info}", file=buf)
+
+        sys.stdout.write(buf.getvalue())
 
 
 def main():
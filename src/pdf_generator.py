@@ -5,10 +5,14 @@ Generates printable PDFs using Avery 5160 template format.
 Formats stickers with customer info, address, and product details.
 """
 
+import io
+import re
 from datetime import datetime
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfgen import canvas
 from reportlab.lib.colors import HexColor
 from order_processor import StickerData
@@ -28,6 +32,35 @@ GRIND_TYPES = [
 ]
 
 
+def _normalize_grind_type(grind: str) -> str:
+    """Map a grind type from GRIND_TYPES to the label printed on the sticker."""
+    grind_lower = grind.lower()
+    if "whole bean" in grind_lower:
+        return "Whole Bean"
+    elif "french press" in grind_lower:
+        return "French Press"
+    elif "auto drip" in grind_lower or "for drip" in grind_lower:
+        return "Ground Auto Drip"
+    elif "espresso" in grind_lower:
+        return "Ground Espresso"
+    return grind
+
+
+# Single case-insensitive scan for all grind types (longest alternatives first).
+# ASCII-only case folding, so e.g. "ſ" does not match "s" (same as comparing .lower() text)
+_GRIND_PATTERN = re.compile(
+    "|".join(re.escape(grind) for grind in sorted(GRIND_TYPES, key=len, reverse=True)),
+    re.IGNORECASE | re.ASCII,
+)
+
+# Matched text (lowercase) -> (priority, normalized label); earlier GRIND_TYPES entries win
+_GRIND_LOOKUP = {
+    grind.lower(): (rank, _normalize_grind_type(grind))
+    for rank, grind in enumerate(GRIND_TYPES)
+}
+
+
+@lru_cache(maxsize=1024)
 def extract_grind_type(variant_info: str, product_name: str) -> Optional[str]:
     """
     Extract grind type from variant info or product name.
@@ -39,23 +72,21 @@ def extract_grind_type(variant_info: str, product_name: str) -> Optional[str]:
     Returns:
         The grind type if found, None otherwise
     """
-    # Check variant_info first (case-insensitive)
-    text_to_check = f"{variant_info} {product_name}".lower()
+    # Check variant_info and product name in one pass (case-insensitive)
+    matches = _GRIND_PATTERN.findall(f"{variant_info} {product_name}")
+    if not matches:
+        return None
+
+    # Return normalized grind type of the highest-priority match
+    return min(_GRIND_LOOKUP[match.lower()] for match in matches)[1]
 
-    for grind in GRIND_TYPES:
-        if grind.lower() in text_to_check:
-            # Return normalized grind type
-            if "whole bean" in grind.lower():
-                return "Whole Bean"
-            elif "french press" in grind.lower():
-                return "French Press"
-            elif "auto drip" in grind.lower() or "for drip" in grind.lower():
-                return "Ground Auto Drip"
-            elif "espresso" in grind.lower():
-                return "Ground Espresso"
-            return grind
 
-    return None
+# Marks a truncated product line
+_ELLIPSIS = "..."
+
+# Sticker text colors
+TEXT_COLOR = HexColor('#000000')  # Black
+SHIP_COLOR = HexColor('#CC0000')  # Red
 
 
 # Avery 5160 Specifications (from PRD)
@@ -76,6 +107,10 @@ AVERY_5160 = {
 class PDFGenerator:
     """Generates PDF files with Avery 5160 label format."""
 
+    # Longest product line that fits on a label; longer lines are cut and end in "..."
+    _MAX_PRODUCT_LINE_LENGTH = 40
+    _PRODUCT_LINE_CUT = _MAX_PRODUCT_LINE_LENGTH - len(_ELLIPSIS)
+
     def __init__(self, output_dir: str = "output"):
         """
         Initialize PDF generator.
@@ -86,6 +121,20 @@ class PDFGenerator:
         self.output_dir = output_dir
         self.spec = AVERY_5160
 
+        # Label positions are the same on every page, so compute them once
+        self._label_positions = self._compute_label_positions()
+
+        # Per-sticker layout offsets (in points), fixed for the label spec
+        self._text_top = self.spec['label_height'] - 0.08 * inch  # First line, near top of label
+        self._line_height = 0.12 * inch  # Tighter spacing to match sample
+        self._left_margin = 0.05 * inch
+        self._count_right = self.spec['label_width'] - 0.05 * inch  # Right edge of the "N/M" count
+
+        # Glyph widths for the "N/M" sticker count (digits and "/" only)
+        self._count_char_widths = {
+            ch: pdfmetrics.stringWidth(ch, "Helvetica-Bold", 10) for ch in "0123456789/"
+        }
+
     def generate_pdf(self, stickers: List[StickerData], filename: str = None) -> str:
         """
         Generate PDF from sticker data.
@@ -103,14 +152,10 @@ class PDFGenerator:
 
         filepath = f"{self.output_dir}/{filename}"
 
-        # Create canvas
-        c = canvas.Canvas(filepath, pagesize=letter)
-
-        # Draw stickers
-        self._draw_stickers(c, stickers)
-
-        # Save PDF
-        c.save()
+        # Render in memory, then save PDF with a single write
+        pdf_data = self.render_pdf(stickers)
+        with open(filepath, 'wb') as pdf_file:
+            pdf_file.write(pdf_data)
 
         print(f"[OK] PDF generated: {filepath}")
         print(f"  Total stickers: {len(stickers)}")
@@ -118,6 +163,33 @@ class PDFGenerator:
 
         return filepath
 
+    def render_pdf(self, stickers: List[StickerData]) -> bytes:
+        """
+        Render sticker data to PDF bytes in memory (no file is written).
+
+        Args:
+            stickers: List of StickerData objects
+
+        Returns:
+            PDF document bytes
+        """
+        # Local stickers first, then SHIP; same-address stickers (same grouping as the
+        # 1/N numbering: name, street, city) stay together and (stable sort) keep their order
+        stickers = sorted(
+            stickers,
+            key=lambda s: (s.requires_shipping, s.customer_name, s.address_line1 or '', s.city or ''),
+        )
+
+        # Create canvas
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=letter)
+
+        # Draw stickers
+        self._draw_stickers(c, stickers)
+
+        c.save()
+        return buffer.getvalue()
+
     def _draw_stickers(self, c: canvas.Canvas, stickers: List[StickerData]):
         """
         Draw all stickers on PDF canvas.
@@ -126,37 +198,49 @@ class PDFGenerator:
             c: ReportLab canvas
             stickers: List of StickerData objects
         """
-        labels_per_page = self.spec['columns'] * self.spec['rows']
+        positions = self._label_positions
+        labels_per_page = len(positions)
 
         for idx, sticker in enumerate(stickers):
-            # Calculate position
-            page_num = idx // labels_per_page
             position_on_page = idx % labels_per_page
 
             # Start new page if needed
             if idx > 0 and position_on_page == 0:
                 c.showPage()
 
-            # Calculate row and column
-            row = position_on_page // self.spec['columns']
-            col = position_on_page % self.spec['columns']
+            # Draw single sticker
+            x, y = positions[position_on_page]
+            self._draw_single_sticker(c, sticker, x, y)
 
-            # Calculate x, y coordinates (bottom-left of label)
-            x = (self.spec['left_margin'] +
-                 col * (self.spec['label_width'] + self.spec['column_gap']))
+    def _compute_label_positions(self) -> List[Tuple[float, float]]:
+        """
+        Compute the bottom-left (x, y) of every label on a page, in drawing order
+        (left to right, top to bottom).
 
-            # Apply offset for third column (4mm = ~0.157 inches) to align with labels
-            if col == 2:
-                x += 0.157 * inch
+        Returns:
+            List of (x, y) coordinates, one per label position
+        """
+        positions = []
 
+        for row in range(self.spec['rows']):
             # Y coordinate: start from top of page, go down
             y = (self.spec['page_height'] -
                  self.spec['top_margin'] -
                  row * (self.spec['label_height'] + self.spec['row_gap']) -
                  self.spec['label_height'])
 
-            # Draw single sticker
-            self._draw_single_sticker(c, sticker, x, y)
+            for col in range(self.spec['columns']):
+                # Calculate x, y coordinates (bottom-left of label)
+                x = (self.spec['left_margin'] +
+                     col * (self.spec['label_width'] + self.spec['column_gap']))
+
+                # Apply offset for third column (4mm = ~0.157 inches) to align with labels
+                if col == 2:
+                    x += 0.157 * inch
+
+                positions.append((x, y))
+
+        return positions
 
     def _draw_single_sticker(self, c: canvas.Canvas, sticker: StickerData, x: float, y: float):
         """
@@ -170,58 +254,65 @@ class PDFGenerator:
             y: Y coordinate (bottom edge)
         """
         # Starting position for text (from top of label, closer to edge)
-        text_y = y + self.spec['label_height'] - 0.08 * inch  # Start near top
-        line_height = 0.12 * inch  # Tighter spacing to match sample
-        left_margin = 0.05 * inch
+        text_y = y + self._text_top
+        line_height = self._line_height
+        text_x = x + self._left_margin
 
-        # Set default font
-        c.setFont("Helvetica", 10)
-        c.setFillColor(HexColor('#000000'))  # Black
-
-        # Draw "SHIP" indicator if needed (red, bold)
+        # Line positions, top to bottom ("SHIP" indicator line only if needed)
+        ship_y = text_y
         if sticker.requires_shipping:
-            c.setFont("Helvetica-Bold", 10)
-            c.setFillColor(HexColor('#CC0000'))  # Red
-            c.drawString(x + left_margin, text_y, "**SHIP**")
-            c.setFillColor(HexColor('#000000'))  # Back to black
             text_y -= line_height
-
-        # Customer name with sticker count (e.g., "1/4" on right side)
-        c.setFont("Helvetica", 10)
-        c.drawString(x + left_margin, text_y, sticker.customer_name)
-
-        # Draw sticker count on right side (e.g., "1/4")
-        count_text = f"{sticker.sticker_number}/{sticker.total_for_address}"
-        count_width = c.stringWidth(count_text, "Helvetica-Bold", 10)
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(x + self.spec['label_width'] - count_width - 0.05 * inch, text_y, count_text)
-        c.setFont("Helvetica", 10)
-
-        text_y -= line_height
+        name_y = text_y
+        address_y = name_y - line_height
+        product_y = address_y - line_height
+        grind_y = product_y - line_height * 0.95
 
         # Address - single line format like sample (street + city)
         # Format: "220 W Ash St. Lombard"
         address_text = f"{sticker.address_line1} {sticker.city}"
-        c.drawString(x + left_margin, text_y, address_text)
-        text_y -= line_height
 
         # Product line with quantity and name
         # Format: "1- Spiritus Coffee Subscription"
         product_line = f"{sticker.quantity}- {sticker.product_name}"
 
         # Truncate if too long
-        if len(product_line) > 40:
-            product_line = product_line[:37] + "..."
+        if len(product_line) > self._MAX_PRODUCT_LINE_LENGTH:
+            product_line = product_line[:self._PRODUCT_LINE_CUT] + _ELLIPSIS
 
-        c.drawString(x + left_margin, text_y, product_line)
-        text_y -= line_height * 0.95
+        # Sticker count for the right side of the name line (e.g., "1/4")
+        count_text = f"{sticker.sticker_number}/{sticker.total_for_address}"
+        count_width = sum(map(self._count_char_widths.__getitem__, count_text))
 
-        # Extract and display grind type (Whole Bean, Ground Auto Drip, French Press)
+        # Extract grind type (Whole Bean, Ground Auto Drip, French Press)
         grind_type = extract_grind_type(sticker.variant_info or "", sticker.product_name)
+
+        # Draw all lines in one text object, regular lines first and then bold ones,
+        # so the font changes at most once per sticker
+        t = c.beginText()
+        t.setFont("Helvetica", 10)
+        t.setFillColor(TEXT_COLOR)
+
+        for line_y, line in ((name_y, sticker.customer_name),
+                             (address_y, address_text),
+                             (product_y, product_line)):
+            t.setTextOrigin(text_x, line_y)
+            t.textOut(line)
+
+        t.setFont("Helvetica-Bold", 10)
+        t.setTextOrigin(x + self._count_right - count_width, name_y)
+        t.textOut(count_text)
+
         if grind_type:
-            c.setFont("Helvetica-Bold", 10)
-            c.drawString(x + left_margin, text_y, grind_type)
-            c.setFont("Helvetica", 10)
+            t.setTextOrigin(text_x, grind_y)
+            t.textOut(grind_type)
+
+        # "SHIP" indicator if needed (red, bold)
+        if sticker.requires_shipping:
+            t.setFillColor(SHIP_COLOR)
+            t.setTextOrigin(text_x, ship_y)
+            t.textOut("**SHIP**")
+
+        c.drawText(t)
 
         # Optional: Draw border for debugging (comment out for production)
         # c.rect(x, y, self.spec['label_width'], self.spec['label_height'])
@@ -5,22 +5,103 @@ This module handles connection to Shopify API and retrieval of unfulfilled order
 It can be run standalone to test the Shopify connection.
 """
 
+import json
 import os
 import sys
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 import shopify
 
 
+# env.env lives in the project root (parent of src/)
+ENV_PATH = Path(__file__).resolve().parent.parent / 'env.env'
+
+# GraphQL page sizes; orders x line items stays under Shopify's 1000-point query cost limit
+ORDERS_PAGE_SIZE = 25
+LINE_ITEMS_PAGE_SIZE = 30
+
+# Line item fields OrderProcessor uses, shared by both queries below
+LINE_ITEM_FIELDS = """
+fragment StickerLineItem on LineItem {
+  quantity
+  name
+  variantTitle
+  customAttributes {
+    key
+    value
+  }
+}
+"""
+
+# Only the fields OrderProcessor uses
+UNFULFILLED_ORDERS_QUERY = """
+query UnfulfilledOrders($query: String!, $ordersFirst: Int!, $lineItemsFirst: Int!, $cursor: String) {
+  orders(first: $ordersFirst, after: $cursor, query: $query) {
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    edges {
+      node {
+        id
+        name
+        tags
+        shippingAddress {
+          firstName
+          lastName
+          address1
+          address2
+          city
+          province
+          provinceCode
+          zip
+        }
+        lineItems(first: $lineItemsFirst) {
+          pageInfo {
+            hasNextPage
+            endCursor
+          }
+          edges {
+            node {
+              ...StickerLineItem
+            }
+          }
+        }
+      }
+    }
+  }
+}
+""" + LINE_ITEM_FIELDS
+
+# Remaining line items of an order with more than LINE_ITEMS_PAGE_SIZE of them
+ORDER_LINE_ITEMS_QUERY = """
+query OrderLineItems($id: ID!, $lineItemsFirst: Int!, $cursor: String) {
+  order(id: $id) {
+    lineItems(first: $lineItemsFirst, after: $cursor) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      edges {
+        node {
+          ...StickerLineItem
+        }
+      }
+    }
+  }
+}
+""" + LINE_ITEM_FIELDS
+
+
 class ShopifyConnector:
     """Handles Shopify API connection and order retrieval."""
 
     def __init__(self):
         """Initialize Shopify connection using environment variables."""
-        # Load env.env from parent directory
-        env_path = os.path.join(os.path.dirname(__file__), '..', 'env.env')
-        load_dotenv(env_path)
+        load_dotenv(ENV_PATH)
 
         self.store_url = os.getenv('SHOPIFY_STORE_URL')
         self.api_key = os.getenv('SHOPIFY_API_KEY')
@@ -46,15 +127,19 @@ class ShopifyConnector:
         shopify.ShopifyResource.activate_session(session)
         print(f"[OK] Connected to Shopify store: {self.shop_name}")
 
-    def get_unfulfilled_orders(self, days_back: int = 7) -> List[Dict[str, Any]]:
+    def get_unfulfilled_orders(self, days_back: int = 7,
+                               exclude_tag: Optional[str] = "Ready For Pickup") -> List[Dict[str, Any]]:
         """
         Retrieve unfulfilled orders from Shopify.
+        Uses a paginated GraphQL query so each page returns orders with their
+        shipping address and line items in a single request.
 
         Args:
             days_back: Number of days to look back for orders (default: 7)
+            exclude_tag: Orders with this tag are filtered out by Shopify (None to keep all)
 
         Returns:
-            List of order dictionaries
+            List of order dictionaries (same shape as the REST API's order JSON)
         """
         # Calculate date range
         start_date = datetime.now() - timedelta(days=days_back)
@@ -62,25 +147,137 @@ class ShopifyConnector:
 
         print(f"\nFetching unfulfilled orders since {start_date_str}...")
 
-        # Retrieve orders using Shopify API
-        # Parameters: fulfillment_status=unfulfilled, created_at_min
-        orders = shopify.Order.find(
-            fulfillment_status='unfulfilled',
-            created_at_min=start_date_str,
-            status='any',  # Include all order statuses
-            limit=250  # Maximum per request
-        )
+        # Search filters: unfulfilled or partially fulfilled (as REST fulfillment_status=unfulfilled),
+        # created since start date, tag excluded
+        search = f"(fulfillment_status:unfulfilled OR fulfillment_status:partial) created_at:>={start_date_str}"
+        if exclude_tag:
+            search += f' -tag:"{exclude_tag}"'
 
-        print(f"[OK] Retrieved {len(orders)} unfulfilled orders")
+        variables = {
+            'query': search,
+            'ordersFirst': ORDERS_PAGE_SIZE,
+            'lineItemsFirst': LINE_ITEMS_PAGE_SIZE,
+            'cursor': None,
+        }
 
-        # Convert to dictionary format for easier processing
+        # Follow cursor pagination until all pages are fetched
         order_list = []
-        for order in orders:
-            order_dict = order.to_dict()
-            order_list.append(order_dict)
+        while True:
+            orders = self._execute_graphql(UNFULFILLED_ORDERS_QUERY, variables)['orders']
+            order_list.extend(
+                self._order_from_node(edge['node'], self._get_line_item_nodes(edge['node']))
+                for edge in orders['edges']
+            )
+
+            if not orders['pageInfo']['hasNextPage']:
+                break
+            variables['cursor'] = orders['pageInfo']['endCursor']
+
+        print(f"[OK] Retrieved {len(order_list)} unfulfilled orders")
 
         return order_list
 
+    def _execute_graphql(self, query: str, variables: Dict[str, Any], max_retries: int = 3) -> Dict[str, Any]:
+        """
+        Run a GraphQL query, backing off and retrying when Shopify throttles it.
+
+        Args:
+            query: GraphQL query document
+            variables: Query variables
+            max_retries: Retries allowed after a THROTTLED response
+
+        Returns:
+            The response's "data" object
+        """
+        for attempt in range(max_retries + 1):
+            result = json.loads(shopify.GraphQL().execute(query, variables))
+            errors = result.get('errors')
+            if not errors:
+                return result['data']
+
+            throttled = isinstance(errors, list) and any(
+                error.get('extensions', {}).get('code') == 'THROTTLED' for error in errors
+            )
+            if not throttled or attempt == max_retries:
+                raise RuntimeError(f"Shopify GraphQL error: {errors}")
+
+            wait = 2 ** attempt
+            print(f"  [WARNING] Shopify rate limit hit, retrying in {wait}s...")
+            time.sleep(wait)
+
+    def _get_line_item_nodes(self, node: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Collect all line items of an order node, fetching further pages
+        for orders with more than LINE_ITEMS_PAGE_SIZE line items.
+
+        Args:
+            node: Order node from the GraphQL response
+
+        Returns:
+            List of line item nodes
+        """
+        line_items = node['lineItems']
+        items = [edge['node'] for edge in line_items['edges']]
+
+        while line_items['pageInfo']['hasNextPage']:
+            variables = {
+                'id': node['id'],
+                'lineItemsFirst': LINE_ITEMS_PAGE_SIZE,
+                'cursor': line_items['pageInfo']['endCursor'],
+            }
+            line_items = self._execute_graphql(ORDER_LINE_ITEMS_QUERY, variables)['order']['lineItems']
+            items.extend(edge['node'] for edge in line_items['edges'])
+
+        return items
+
+    @staticmethod
+    def _order_from_node(node: Dict[str, Any], line_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Convert a GraphQL order node to the REST-style order dictionary
+        consumed by OrderProcessor.
+
+        Args:
+            node: Order node from the GraphQL response
+            line_items: All line item nodes of the order (see _get_line_item_nodes)
+
+        Returns:
+            Order dictionary
+        """
+        order = {
+            'name': node['name'],
+            'tags': ', '.join(node.get('tags') or []),
+            'line_items': [
+                {
+                    'quantity': item['quantity'],
+                    'name': item['name'],
+                    'variant_title': item.get('variantTitle'),
+                    'properties': [
+                        {'name': attr['key'], 'value': attr['value']}
+                        for attr in item.get('customAttributes') or []
+                    ],
+                }
+                for item in line_items
+            ],
+        }
+
+        # No-shipping orders have a null address; leave the key out as the REST API does.
+        # The customer record is not queried (needs the read_customers scope);
+        # the shipping name is what goes on the sticker
+        shipping = node.get('shippingAddress')
+        if shipping:
+            order['shipping_address'] = {
+                'first_name': shipping.get('firstName'),
+                'last_name': shipping.get('lastName'),
+                'address1': shipping.get('address1'),
+                'address2': shipping.get('address2'),
+                'city': shipping.get('city'),
+                'province': shipping.get('province'),
+                'province_code': shipping.get('provinceCode'),
+                'zip': shipping.get('zip'),
+            }
+
+        return order
+
     def filter_orders(self, orders: List[Dict[str, Any]], exclude_tag: str = "Ready For Pickup") -> List[Dict[str, Any]]:
         """
         Filter orders to exclude those with specific tag.
@@ -96,14 +293,14 @@ class ShopifyConnector:
         excluded_count = 0
 
         for order in orders:
-            tags = order.get('tags', '')
-            # Tags are stored as comma-separated string
-            tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-
-            if exclude_tag not in tag_list:
-                filtered.append(order)
-            else:
+            tags = order.get('tags') or ''
+            # Tags are stored as comma-separated string; only split it when the
+            # tag text appears at all (most orders don't carry it). An empty
+            # exclude_tag never matches, as empty tags are not real tags
+            if exclude_tag and exclude_tag in tags and exclude_tag in (tag.strip() for tag in tags.split(',')):
                 excluded_count += 1
+            else:
+                filtered.append(order)
 
         print(f"[OK] Filtered out {excluded_count} orders with '{exclude_tag}' tag")
         print(f"[OK] {len(filtered)} orders remaining for processing")
@@ -123,10 +320,8 @@ class ShopifyConnector:
 
         for i, order in enumerate(orders, 1):
             order_name = order.get('name', 'N/A')
-            customer = order.get('customer', {})
-            customer_name = f"{customer.get('first_name', '')} {customer.get('last_name', '')}".strip()
-
-            shipping_address = order.get('shipping_address', {})
+            shipping_address = order.get('shipping_address') or {}
+            customer_name = f"{shipping_address.get('first_name') or ''} {shipping_address.get('last_name') or ''}".strip()
             city = shipping_address.get('city', 'N/A')
 
             line_items = order.get('line_items', [])